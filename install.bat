@@ -37,6 +37,7 @@ python -m pip install --upgrade pip
 pip install PyQt5
 pip install pyinstaller
 pip install whisperx
+pip install ijson
 
 :: Create executable using PyInstaller
 echo Creating executable...
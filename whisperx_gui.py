@@ -4,136 +4,127 @@ A PyQt5 GUI wrapper to run whisperx transcription (CPU by default).
 Features:
  - File selection (audio/video)
  - Model selection
+ - Backend selection (whisperx or whisper.cpp with quantized ggml models)
  - Output format selection (txt, srt, json)
  - Diarization toggle (uses HF token if enabled)
  - HF token input (masked)
- - Run in background thread with live log
+ - Run in background process with live log
  - Option to open output folder after finish
 """
 
 import sys
 import os
+import json
 import shlex
-import subprocess
 import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
 from PyQt5 import QtWidgets, QtGui, QtCore
 
+try:
+    import ijson  # optional: streams JSON segments instead of loading the whole file
+except ImportError:
+    ijson = None
+
 # ====== CONFIG - update to point to python interpreter that has whisperx installed ======
 # You can set this to your venv python exe, or just "python" if running in same env
-def get_python_executable():
-    """Get the correct Python executable based on environment"""
-    if hasattr(sys, 'frozen'):
-        # Running as compiled exe
-        return sys.executable
-    
-    venv_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "venv")
-    if os.path.exists(venv_dir):
-        return os.path.join(venv_dir, "Scripts", "python.exe")
-    return "python.exe"
-
-DEFAULT_PYTHON = get_python_executable()
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Directory of the script, or of the executable when running as a compiled exe
+BASE_DIR = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else APP_DIR
+
+def get_venv_dir():
+    """Return the bundled venv directory next to this script, or None if absent"""
+    venv_dir = os.path.join(APP_DIR, "venv")
+    return venv_dir if os.path.exists(venv_dir) else None
+
+VENV_DIR = get_venv_dir()
+DEFAULT_PYTHON = os.path.join(VENV_DIR, "Scripts", "python.exe") if VENV_DIR else "python.exe"
+
+# Optional whisper.cpp backend: binary in ./whisper.cpp, quantized models in ./models
+WHISPER_CPP_DIR = os.path.join(BASE_DIR, "whisper.cpp")
+# Current releases ship whisper-cli.exe; older ones only have main.exe
+WHISPER_CPP_BINS = ("whisper-cli.exe", "main.exe")
+GGML_MODELS_DIR = os.path.join(BASE_DIR, "models")
+# Quantizations tried in order; tiny/base/small are only published as q5_1/q8_0
+GGML_QUANTS = ("q5_0", "q5_1", "q8_0")
+# Input formats whisper.cpp can decode without ffmpeg
+WHISPER_CPP_EXTENSIONS = (".wav", ".mp3", ".flac")
+
+BACKEND_WHISPERX = "whisperx (python)"
+BACKEND_GGML = "whisper.cpp (ggml)"
 # ======================================================================================
 
-# Update the venv detection and script paths
-DEFAULT_PYTHON = "python.exe"  # default fallback
-ACTIVATE_SCRIPT = None
-venv_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "venv")
-
-if os.path.exists(venv_dir):
-    DEFAULT_PYTHON = os.path.join(venv_dir, "Scripts", "python.exe")
-    ACTIVATE_SCRIPT = os.path.join(venv_dir, "Scripts", "activate.bat")
-    os.environ['VIRTUAL_ENV'] = venv_dir
-    os.environ['PATH'] = os.path.join(venv_dir, 'Scripts') + os.pathsep + os.environ['PATH']
-
-class WorkerSignals(QtCore.QObject):
-    progress = QtCore.pyqtSignal(str)
-    finished = QtCore.pyqtSignal(int)       # exit code
-    error = QtCore.pyqtSignal(str)
-
-class TranscribeWorker(QtCore.QRunnable):
-    def __init__(self, cmd_list, cwd=None):
-        super().__init__()
-        self.cmd_list = [str(x) for x in cmd_list]  # Convert all arguments to strings
-        self.cwd = cwd
-        self.signals = WorkerSignals()
-
-    @QtCore.pyqtSlot()
-    def run(self):
-        try:
-            env = os.environ.copy()
-            
-            # Build the command with venv activation if available
-            if ACTIVATE_SCRIPT and os.path.exists(ACTIVATE_SCRIPT):
-                # Create a batch script that activates venv and runs the command
-                temp_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_whisperx.bat")
-                with open(temp_script, "w", encoding='utf-8') as f:
-                    f.write('@echo off\n')
-                    f.write(f'call "{ACTIVATE_SCRIPT}"\n')
-                    # Set HF_TOKEN environment variable if present
-                    if '--hf_token' in self.cmd_list:
-                        token_index = self.cmd_list.index('--hf_token') + 1
-                        if token_index < len(self.cmd_list):
-                            f.write(f'set HF_TOKEN={self.cmd_list[token_index]}\n')
-                    
-                    # Build the whisperx command
-                    cmd = f'python -m whisperx "{self.cmd_list[3]}" '  # Input file
-                    cmd += f'--model {self.cmd_list[5]} '
-                    cmd += f'--output_dir "{self.cmd_list[7]}" '
-                    cmd += f'--output_format {self.cmd_list[9]} '
-                    cmd += f'--compute_type {self.cmd_list[11]} '
-                    cmd += f'--device {self.cmd_list[13]}'
-                    
-                    # Add diarization if enabled
-                    if '--diarize' in self.cmd_list:
-                        cmd += ' --diarize'
-                    
-                    f.write(cmd + '\n')
-
-                # Run the batch script
-                proc = subprocess.Popen(
-                    temp_script,
-                    cwd=self.cwd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    shell=True,
-                    env=env
-                )
-            else:
-                # Fallback if no venv activation script exists
-                proc = subprocess.Popen(
-                    self.cmd_list,
-                    cwd=self.cwd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    universal_newlines=True,
-                    env=env
-                )
-
-            # Process output
-            while True:
-                line = proc.stdout.readline()
-                if not line and proc.poll() is not None:
-                    break
-                if line:
-                    self.signals.progress.emit(line.strip())
-            
-            # Clean up temporary batch script
-            if os.path.exists(ACTIVATE_SCRIPT) and os.path.exists("run_whisperx.bat"):
-                try:
-                    os.remove("run_whisperx.bat")
-                except:
-                    pass
-
-            # Emit completion signal with return code
-            self.signals.finished.emit(proc.returncode)
-
-        except Exception as e:
-            self.signals.error.emit(str(e))
-            self.signals.finished.emit(-1)
-
+# Persistent model cache so downloaded weights are reused across runs
+MODEL_CACHE_DIR = os.path.join(BASE_DIR, "hf_cache")
+
+def find_icon_path():
+    """Return the first application icon found next to the script/executable, or None"""
+    icon_paths = (
+        os.path.join(BASE_DIR, "assets", "whisperx.ico"),
+        os.path.join(BASE_DIR, "whisperx.ico"),
+        os.path.join(BASE_DIR, "assets", "whisperx_icon.png"),
+        os.path.join(BASE_DIR, "whisperx_icon.png"),
+    )
+    return next((p for p in icon_paths if os.path.exists(p)), None)
+
+def find_whisper_cpp_bin():
+    """Return the whisper.cpp executable, preferring whisper-cli.exe over main.exe, or None"""
+    bins = (os.path.join(WHISPER_CPP_DIR, name) for name in WHISPER_CPP_BINS)
+    return next((p for p in bins if os.path.exists(p)), None)
+
+# Resolved once at import so window creation does no filesystem probing
+_ICON_PATH = find_icon_path()
+
+@dataclass
+class TranscribeJob:
+    """Settings for one transcription run; builds the backend command line from named fields"""
+    infile: str
+    model: str
+    outdir: str
+    outformat: str
+    compute: str
+    device: str
+    threads: int
+    batch_size: int
+    diarize: bool = False
+    hf_token: Optional[str] = None  # passed via HF_TOKEN env, never in argv
+    backend: str = BACKEND_WHISPERX
+
+    @property
+    def ggml_model_candidates(self):
+        return [os.path.join(GGML_MODELS_DIR, f"ggml-{self.model}-{q}.bin") for q in GGML_QUANTS]
+
+    @property
+    def ggml_model(self):
+        """First quantized model found for this model size, or None"""
+        return next((p for p in self.ggml_model_candidates if os.path.exists(p)), None)
+
+    def argv(self):
+        if self.backend == BACKEND_GGML:
+            formats = {"txt", "srt", "json"} if self.outformat == "all" else set(self.outformat.split(","))
+            # whisper.cpp appends the extension to the -of prefix
+            base = os.path.splitext(os.path.basename(self.infile))[0]
+            argv = [find_whisper_cpp_bin(), "-m", self.ggml_model,
+                    "-t", str(self.threads),
+                    "-of", os.path.join(self.outdir, base)]
+            argv += [flag for fmt, flag in (("txt", "-otxt"), ("srt", "-osrt"), ("json", "-oj")) if fmt in formats]
+            argv.append(self.infile)
+            return argv
+
+        argv = [DEFAULT_PYTHON, "-m", "whisperx", self.infile,
+                "--model", self.model,
+                "--output_dir", self.outdir,
+                "--output_format", self.outformat,
+                "--compute_type", self.compute,
+                "--device", self.device,
+                "--threads", str(self.threads),
+                "--batch_size", str(self.batch_size)]
+        if self.diarize:
+            argv.append("--diarize")
+        return argv
 
 class WhisperXApp(QtWidgets.QWidget):
     def __init__(self):
@@ -142,37 +133,11 @@ class WhisperXApp(QtWidgets.QWidget):
         self.resize(780, 520)
         
         # Set application icon if available
-        try:
-            # Get the application's base directory
-            if getattr(sys, 'frozen', False):
-                # If running as compiled executable
-                base_dir = os.path.dirname(sys.executable)
-            else:
-                # If running from script
-                base_dir = os.path.dirname(os.path.abspath(__file__))
-            
-            # Try different icon locations
-            icon_paths = [
-                os.path.join(base_dir, "assets", "whisperx.ico"),
-                os.path.join(base_dir, "whisperx.ico"),
-                os.path.join(base_dir, "assets", "whisperx_icon.png"),
-                os.path.join(base_dir, "whisperx_icon.png")
-            ]
-            
-            icon_set = False
-            for icon_path in icon_paths:
-                if os.path.exists(icon_path):
-                    self.setWindowIcon(QtGui.QIcon(icon_path))
-                    icon_set = True
-                    break
-                    
-            if not icon_set:
-                print(f"Warning: No icon found in paths: {icon_paths}")
-        except Exception as e:
-            print(f"Failed to set application icon: {e}")
+        if _ICON_PATH:
+            self.setWindowIcon(QtGui.QIcon(_ICON_PATH))
+        else:
+            print("Warning: No application icon found")
         
-        self.threadpool = QtCore.QThreadPool()
-
         layout = QtWidgets.QVBoxLayout(self)
 
         # File selection
@@ -186,6 +151,10 @@ class WhisperXApp(QtWidgets.QWidget):
 
         # Model / options
         options_layout = QtWidgets.QGridLayout()
+        self.backend_combo = QtWidgets.QComboBox()
+        self.backend_combo.addItems([BACKEND_WHISPERX, BACKEND_GGML])
+        self.backend_combo.setCurrentText(BACKEND_WHISPERX)
+
         self.model_combo = QtWidgets.QComboBox()
         self.model_combo.addItems(["tiny","base","small","medium","large-v2","large-v3"])
         self.model_combo.setCurrentText("medium")
@@ -195,12 +164,14 @@ class WhisperXApp(QtWidgets.QWidget):
         self.format_combo.setCurrentText("txt")
 
         self.compute_combo = QtWidgets.QComboBox()
-        self.compute_combo.addItems(["float32","int8"])  # float32 recommended for CPU precision
-        self.compute_combo.setCurrentText("float32")
+        # The whisperx CLI only accepts these; int8 is fastest on CPU, float16 on CUDA
+        self.compute_combo.addItems(["float32","float16","int8"])
 
         self.device_combo = QtWidgets.QComboBox()
         self.device_combo.addItems(["cpu","cuda"])
+        self.device_combo.currentTextChanged.connect(self._sync_compute_default)
         self.device_combo.setCurrentText("cpu")
+        self._sync_compute_default(self.device_combo.currentText())
 
         self.diarize_checkbox = QtWidgets.QCheckBox("Enable diarization (pyannote)")
         self.diarize_checkbox.setChecked(False)
@@ -209,9 +180,23 @@ class WhisperXApp(QtWidgets.QWidget):
         self.hf_token.setPlaceholderText("Hugging Face Token (required for gated diarize)")
         self.hf_token.setEchoMode(QtWidgets.QLineEdit.Password)
 
+        cpu_count = os.cpu_count() or 4
+        self.threads_spin = QtWidgets.QSpinBox()
+        self.threads_spin.setRange(1, cpu_count)
+        self.threads_spin.setValue(cpu_count)
+
+        self.batch_size_spin = QtWidgets.QSpinBox()
+        self.batch_size_spin.setRange(1, 32)
+        self.batch_size_spin.setValue(16)
+
+        self.optimize_threads_checkbox = QtWidgets.QCheckBox("Optimize CPU threads")
+        self.optimize_threads_checkbox.setToolTip("Use MKL and pin OpenMP/MKL threads to the Threads value")
+        self.optimize_threads_checkbox.setChecked(True)
+
         self.timestamped_txt_checkbox = QtWidgets.QCheckBox("Include timestamps in TXT")
         self.timestamped_txt_checkbox.setChecked(False)
         options_layout.addWidget(self.timestamped_txt_checkbox, 3, 0, 1, 2)
+        options_layout.addWidget(self.optimize_threads_checkbox, 3, 2, 1, 2)
 
         options_layout.addWidget(QtWidgets.QLabel("Model:"),0,0)
         options_layout.addWidget(self.model_combo,0,1)
@@ -224,6 +209,12 @@ class WhisperXApp(QtWidgets.QWidget):
         options_layout.addWidget(self.diarize_checkbox,2,0,1,2)
         options_layout.addWidget(QtWidgets.QLabel("HF Token:"),2,2)
         options_layout.addWidget(self.hf_token,2,3)
+        options_layout.addWidget(QtWidgets.QLabel("Threads:"),4,0)
+        options_layout.addWidget(self.threads_spin,4,1)
+        options_layout.addWidget(QtWidgets.QLabel("Batch size:"),4,2)
+        options_layout.addWidget(self.batch_size_spin,4,3)
+        options_layout.addWidget(QtWidgets.QLabel("Backend:"),5,0)
+        options_layout.addWidget(self.backend_combo,5,1)
 
         # Advanced options
         adv_layout = QtWidgets.QHBoxLayout()
@@ -249,6 +240,13 @@ class WhisperXApp(QtWidgets.QWidget):
         self.log.setReadOnly(True)
         self.log.setMaximumBlockCount(10000)
 
+        # Coalesce log output and repaint at most every 50ms
+        self._pending_log = []
+        self._log_timer = QtCore.QTimer(self)
+        self._log_timer.setInterval(50)
+        self._log_timer.timeout.connect(self._flush_log)
+        self._log_timer.start()
+
         layout.addLayout(file_layout)
         layout.addLayout(options_layout)
         layout.addLayout(adv_layout)
@@ -260,7 +258,10 @@ class WhisperXApp(QtWidgets.QWidget):
         self.status_bar = QtWidgets.QLabel("")
         layout.addWidget(self.status_bar)
 
-        self.current_proc = None
+        self.proc = None
+        self._proc_buf = bytearray()
+        self.current_job = None
+        self._cancelled = False
 
     def browse_file(self):
         fn, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Select audio or video file",
@@ -276,9 +277,27 @@ class WhisperXApp(QtWidgets.QWidget):
         if d:
             self.output_dir_input.setText(d)
 
+    def _sync_compute_default(self, device):
+        # float16 has no efficient CPU kernels; disable it there and explain why
+        idx = self.compute_combo.findText("float16")
+        self.compute_combo.model().item(idx).setEnabled(device != "cpu")
+        self.compute_combo.setItemData(idx, "Not supported on CPU, use int8 or float32"
+                                       if device == "cpu" else "", QtCore.Qt.ToolTipRole)
+        # int8 roughly halves CPU runtime and memory with negligible accuracy loss
+        self.compute_combo.setCurrentText("int8" if device == "cpu" else "float16")
+
     def append_log(self, text):
+        self._pending_log.append(text)
+
+    def _flush_log(self):
+        if not self._pending_log:
+            return
         ts = time.strftime("%H:%M:%S")
-        self.log.appendPlainText(f"[{ts}] {text}")
+        lines = "\n".join(self._pending_log).split("\n")
+        self._pending_log.clear()
+        self.log.setUpdatesEnabled(False)
+        self.log.appendPlainText("\n".join(f"[{ts}] {line}" for line in lines))
+        self.log.setUpdatesEnabled(True)
         self.log.verticalScrollBar().setValue(self.log.verticalScrollBar().maximum())
 
         
@@ -292,6 +311,7 @@ class WhisperXApp(QtWidgets.QWidget):
         outdir = self.output_dir_input.text().strip() or "output"
         os.makedirs(outdir, exist_ok=True)
 
+        backend = self.backend_combo.currentText()
         model = self.model_combo.currentText()
         outformat = self.format_combo.currentText()
         compute = self.compute_combo.currentText()
@@ -300,41 +320,120 @@ class WhisperXApp(QtWidgets.QWidget):
         hf_token = self.hf_token.text().strip()
         timestamped_txt = self.timestamped_txt_checkbox.isChecked()
 
-        # Build command
-        cmd = [DEFAULT_PYTHON, "-m", "whisperx", infile,
-               "--model", model,
-               "--output_dir", outdir,
-               "--output_format", outformat,
-               "--compute_type", compute,
-               "--device", device]
-        
-        # Ensure JSON output is included if timestamped TXT is requested
-        if timestamped_txt and outformat != "all":
-            # Change output format to "all" to ensure JSON is generated
-            cmd[cmd.index("--output_format") + 1] = "all"
-            self.append_log(f"Changed output format to 'all' for timestamped TXT (includes JSON)")
-
-        if diarize:
-            if not hf_token:
+        job = TranscribeJob(infile=infile, model=model, outdir=outdir, outformat=outformat,
+                            compute=compute, device=device,
+                            threads=self.threads_spin.value(),
+                            batch_size=self.batch_size_spin.value(),
+                            diarize=diarize, hf_token=hf_token or None, backend=backend)
+
+        if backend == BACKEND_GGML:
+            if Path(infile).suffix.lower() not in WHISPER_CPP_EXTENSIONS:
+                QtWidgets.QMessageBox.warning(self, "Unsupported file",
+                                              "whisper.cpp backend only supports "
+                                              + ", ".join(WHISPER_CPP_EXTENSIONS) + " files.")
+                return
+            if not find_whisper_cpp_bin():
+                QtWidgets.QMessageBox.warning(self, "whisper.cpp not found",
+                                              "whisper.cpp backend requires one of:\n"
+                                              + "\n".join(os.path.join(WHISPER_CPP_DIR, n) for n in WHISPER_CPP_BINS))
+                return
+            if not job.ggml_model:
+                QtWidgets.QMessageBox.warning(self, "whisper.cpp model not found",
+                                              f"No {model} model found, expected one of:\n"
+                                              + "\n".join(job.ggml_model_candidates))
+                return
+            self.append_log(f"Using whisper.cpp model: {os.path.basename(job.ggml_model)}")
+            if diarize:
+                self.append_log("Diarization is not supported by whisper.cpp, ignoring.")
+                job.diarize = False
+
+            # Ensure JSON output is included if timestamped TXT is requested
+            if timestamped_txt and "json" not in outformat.split(","):
+                job.outformat = outformat + ",json"
+                self.append_log("Added JSON output for timestamped TXT")
+        else:
+            if device == "cpu" and compute == "float32":
+                self.append_log("Consider int8 for 2x CPU speedup [whisperX README]")
+
+            # Ensure JSON output is included if timestamped TXT is requested
+            if timestamped_txt and outformat != "all":
+                # Change output format to "all" to ensure JSON is generated
+                job.outformat = "all"
+                self.append_log(f"Changed output format to 'all' for timestamped TXT (includes JSON)")
+
+            if diarize and not hf_token:
                 QtWidgets.QMessageBox.warning(self, "HF token required", "Diarization requires a Hugging Face token (gated model).")
                 return
-            cmd += ["--diarize", "--hf_token", hf_token]
 
-        # Show command in log (sanitized)
-        cmd_display = " ".join(shlex.quote(x) if x != hf_token else "<HF_TOKEN>" for x in cmd)
-        self.append_log("Launching: " + cmd_display)
+        # Build command; the HF token never appears in argv so the log needs no redaction
+        self.current_job = job
+        cmd = job.argv()
+        self.append_log("Launching: " + " ".join(shlex.quote(x) for x in cmd))
 
         # Disable UI while running
+        self._cancelled = False
         self.run_btn.setEnabled(False)
         self.cancel_btn.setEnabled(True)
         self.status_bar.setText("Running...")
 
-        worker = TranscribeWorker(cmd, cwd=None)
-        worker.signals.progress.connect(self.append_log)
-        worker.signals.error.connect(lambda e: self.append_log("[ERROR] " + e))
-        worker.signals.finished.connect(self._on_finished)
-        self.threadpool.start(worker)
-        self.current_worker = worker
+        # Expose the venv and pass the HF token via the environment
+        env = QtCore.QProcessEnvironment.systemEnvironment()
+        if VENV_DIR:
+            env.insert("VIRTUAL_ENV", VENV_DIR)
+            env.insert("PATH", os.path.join(VENV_DIR, "Scripts") + os.pathsep + env.value("PATH"))
+        if job.diarize and job.hf_token:
+            env.insert("HF_TOKEN", job.hf_token)
+        # Keep models in a cache next to the app unless the user configured one
+        if not env.contains("HF_HOME"):
+            env.insert("HF_HOME", MODEL_CACHE_DIR)
+        if not env.contains("XDG_CACHE_HOME"):
+            env.insert("XDG_CACHE_HOME", MODEL_CACHE_DIR)
+        if self.optimize_threads_checkbox.isChecked():
+            # Force CTranslate2's MKL GEMM backend and bind OpenMP/MKL threads
+            threads = str(job.threads)
+            env.insert("CT2_USE_MKL", "1")
+            env.insert("OMP_NUM_THREADS", threads)
+            env.insert("MKL_NUM_THREADS", threads)
+            env.insert("KMP_AFFINITY", "granularity=fine,compact,1,0")
+            env.insert("KMP_BLOCKTIME", "1")
+
+        # QProcess delivers output on the Qt event loop, no reader thread needed
+        self._proc_buf = bytearray()
+        self.proc = QtCore.QProcess(self)
+        self.proc.setProcessChannelMode(QtCore.QProcess.MergedChannels)
+        self.proc.setProcessEnvironment(env)
+        self.proc.readyReadStandardOutput.connect(self._read_proc_output)
+        self.proc.errorOccurred.connect(self._on_proc_error)
+        self.proc.finished.connect(self._on_proc_finished)
+        self.proc.start(cmd[0], cmd[1:])
+
+    def _read_proc_output(self):
+        # Treat \r (progress bars) as line breaks and keep the trailing partial line
+        self._proc_buf += bytes(self.proc.readAllStandardOutput()).replace(b"\r", b"\n")
+        lines = self._proc_buf.split(b"\n")
+        self._proc_buf = lines.pop()
+        text = "\n".join(l for l in (line.decode("utf-8", "replace").strip() for line in lines) if l)
+        if text:
+            self.append_log(text)
+
+    def _on_proc_error(self, error):
+        # finished is not emitted when the process could not be started
+        if error == QtCore.QProcess.FailedToStart:
+            self.append_log("[ERROR] " + self.proc.errorString())
+            self._release_proc()
+            self._on_finished(-1)
+
+    def _on_proc_finished(self, exit_code, exit_status):
+        tail = self._proc_buf.decode("utf-8", "replace").strip()
+        if tail:
+            self.append_log(tail)
+        self._release_proc()
+        self._on_finished(exit_code if exit_status == QtCore.QProcess.NormalExit else -1)
+
+    def _release_proc(self):
+        self.proc.deleteLater()
+        self.proc = None
+        self._proc_buf = bytearray()
 
     def _on_finished(self, exit_code):
         self.run_btn.setEnabled(True)
@@ -349,118 +448,109 @@ class WhisperXApp(QtWidgets.QWidget):
                 except Exception as e:
                     self.append_log(f"[ERROR] Failed to create timestamped TXT: {e}")
             QtWidgets.QMessageBox.information(self, "Done", "Transcription completed. Check the output folder.")
+        elif self._cancelled:
+            # taskkill/kill() produce a non-zero exit code; this is not an error
+            self.append_log("Process cancelled by user.")
+            self.status_bar.setText("Cancelled")
         else:
             self.append_log(f"Process exited with code {exit_code}")
             self.status_bar.setText("Exited with error ❌")
             QtWidgets.QMessageBox.warning(self, "Error", f"Transcription ended with code {exit_code}.\nSee log for details.")
 
     def cancel(self):
-        # we used subprocess in worker; we cannot kill it directly here unless we maintain process handle
-        # Option: ask user to kill command window or we can implement a better process handle sharing.
-        QtWidgets.QMessageBox.information(self, "Cancel", "Cancel is best-effort. If process is running, close the terminal/kill python process to force stop.")
-        self.append_log("Cancel requested (best effort).")
+        if not self.proc or self.proc.state() == QtCore.QProcess.NotRunning:
+            self.append_log("Nothing to cancel.")
+            return
+        self.append_log("Cancel requested, stopping process...")
+        self._cancelled = True
+        if os.name == "nt":
+            # QProcess.kill() only ends the direct child; /T also stops its ffmpeg children
+            QtCore.QProcess.startDetached("taskkill", ["/F", "/T", "/PID", str(self.proc.processId())])
+        else:
+            self.proc.kill()
 
     def _create_timestamped_txt(self):
         """
-        Parse the JSON output from WhisperX and create a sentence/segment-level timestamped TXT file.
+        Parse the JSON output from WhisperX (or whisper.cpp) and create a sentence/segment-level
+        timestamped TXT file.
         Each line: [HH:MM:SS] text
         """
-        import json
-        from datetime import timedelta
-        import glob
-        
-        infile = self.file_input.text().strip()
-        outdir = self.output_dir_input.text().strip() or "output"
-        base = os.path.splitext(os.path.basename(infile))[0]
+        # Use the settings of the finished run, the widgets may have changed since
+        job = self.current_job
+        outdir = job.outdir
+        base = os.path.splitext(os.path.basename(job.infile))[0]
         
         # Try to find the JSON file - WhisperX might create it with different naming
         json_path = os.path.join(outdir, base + ".json")
         if not os.path.exists(json_path):
-            # Try alternative naming patterns
-            json_patterns = [
-                os.path.join(outdir, base + "*.json"),
-                os.path.join(outdir, "*.json")
-            ]
-            json_found = False
-            for pattern in json_patterns:
-                json_files = glob.glob(pattern)
-                if json_files:
-                    # Use the first JSON file found
-                    json_path = json_files[0]
-                    json_found = True
-                    self.append_log(f"Found JSON file: {json_path}")
-                    break
-            
-            if not json_found:
+            # Try alternative naming patterns with a single directory scan
+            entries = list(Path(outdir).iterdir())
+            json_files = [p for p in entries if p.suffix == ".json"]
+            json_files = [p for p in json_files if p.stem.startswith(base)] or json_files
+            if not json_files:
                 # List all files in output directory for debugging
-                all_files = os.listdir(outdir)
-                self.append_log(f"Files in output directory: {all_files}")
-                raise FileNotFoundError(f"JSON output not found. Expected: {os.path.join(outdir, base + '.json')}")
+                self.append_log(f"Files in output directory: {[p.name for p in entries]}")
+                raise FileNotFoundError(f"JSON output not found. Expected: {json_path}")
+            # Use the first JSON file found
+            json_path = str(json_files[0])
+            self.append_log(f"Found JSON file: {json_path}")
         
         txt_path = os.path.join(outdir, base + ".timestamped.txt")
         
+        # Write to a temporary file so a failed parse never clobbers an existing TXT
+        tmp_path = txt_path + ".tmp"
+        count = 0
         try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except json.JSONDecodeError as e:
+            with open(json_path, "rb") as jf, open(tmp_path, "w", encoding="utf-8", buffering=1 << 20) as of:
+                # WhisperX JSON: expect 'segments' key with list of dicts with 'start', 'end', 'text'
+                # whisper.cpp JSON: 'transcription' list with 'offsets' {'from', 'to'} in ms and 'text'
+                ggml = job.backend == BACKEND_GGML
+                key = "transcription" if ggml else "segments"
+                if ijson is not None:
+                    segments = ijson.items(jf, key + ".item")
+                else:
+                    segments = json.load(jf).get(key)
+                    if not isinstance(segments, list):
+                        raise ValueError(f"Invalid JSON: '{key}' key missing or not a list.")
+
+                for seg in segments:
+                    start = (seg.get("offsets") or {}).get("from") if ggml else seg.get("start")
+                    text = seg.get("text")
+                    if start is None or not isinstance(text, str):
+                        continue  # skip malformed segments
+
+                    # Format start time as [HH:MM:SS]
+                    try:
+                        secs = int(float(start) / 1000) if ggml else int(float(start))
+                    except (TypeError, ValueError, OverflowError) as e:
+                        self.append_log(f"Warning: Skipping segment with invalid timestamp: {e}")
+                        continue  # skip segment if error
+                    h, rem = divmod(secs, 3600)
+                    m, sec = divmod(rem, 60)
+                    line = f"[{h:02d}:{m:02d}:{sec:02d}] {text.strip()}"
+
+                    if count:
+                        of.write("\n")
+                    of.write(line)
+                    count += 1
+            if not count:
+                raise ValueError("No valid segments found in JSON.")
+            os.replace(tmp_path, txt_path)
+        except (json.JSONDecodeError, getattr(ijson, "JSONError", json.JSONDecodeError)) as e:
             raise ValueError(f"Invalid JSON file {json_path}: {e}")
-        
-        # WhisperX JSON: expect 'segments' key with list of dicts with 'start', 'end', 'text'
-        segments = data.get("segments")
-        if not isinstance(segments, list):
-            raise ValueError("Invalid JSON: 'segments' key missing or not a list.")
-        
-        lines = []
-        for seg in segments:
-            start = seg.get("start")
-            text = seg.get("text")
-            if start is None or text is None:
-                continue  # skip malformed segments
-            
-            # Format start time as [HH:MM:SS]
-            try:
-                start_td = timedelta(seconds=float(start))
-                start_str = str(start_td)
-                if "." in start_str:
-                    start_str = start_str.split(".")[0]
-                if len(start_str.split(":")) == 2:
-                    start_str = "0:" + start_str  # pad hours if needed
-                line = f"[{start_str}] {text.strip()}"
-                lines.append(line)
-            except Exception as e:
-                self.append_log(f"Warning: Skipping segment with invalid timestamp: {e}")
-                continue  # skip segment if error
-        
-        if not lines:
-            raise ValueError("No valid segments found in JSON.")
-        
-        with open(txt_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(lines))
-        
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
         self.append_log(f"Timestamped TXT created: {txt_path}")
-        self.append_log(f"Processed {len(lines)} segments from JSON")
+        self.append_log(f"Processed {count} segments from JSON")
 
 def main():
     app = QtWidgets.QApplication(sys.argv)
 
     # Set application icon globally (shows in taskbar and alt-tab)
-    try:
-        if getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-        icon_paths = [
-            os.path.join(base_dir, "assets", "whisperx.ico"),
-            os.path.join(base_dir, "whisperx.ico"),
-            os.path.join(base_dir, "assets", "whisperx_icon.png"),
-            os.path.join(base_dir, "whisperx_icon.png")
-        ]
-        for icon_path in icon_paths:
-            if os.path.exists(icon_path):
-                app.setWindowIcon(QtGui.QIcon(icon_path))
-                break
-    except Exception as e:
-        print(f"Failed to set global app icon: {e}")
+    if _ICON_PATH:
+        app.setWindowIcon(QtGui.QIcon(_ICON_PATH))
 
     win = WhisperXApp()
     win.show()